@@ -1,8 +1,29 @@
 import os
 import re
 import sys
+import shlex
+import locale
+import shutil
+import hashlib
+import tempfile
 import textwrap
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+# CPython (3.8+) starts a child with posix_spawn() only when close_fds=False
+# and the executable is a path with a directory part; otherwise it goes
+# through its own fork/exec helper (vfork-based since 3.10). So every child
+# below is started with close_fds=False, and the tools are resolved to full
+# paths once here. A tool that is not on PATH keeps its bare name and fails
+# with FileNotFoundError when it is used, as before.
+def _which(name: str) -> str:
+    return shutil.which(name) or name
+
+_GCC = _which("gcc")
+_MAKE = _which("make")
+_PYTHON = _which("python3")
+_XDG_OPEN = _which("xdg-open")
 
 def syntax():
     """
@@ -16,98 +37,376 @@ def syntax():
         "</js>": "</script>",
     }
 
-def compile_webthon_file(source_file: str, html_output: str, c_folder: str, python_folder: str) -> None:
-    if not os.path.isfile(source_file):
-        raise FileNotFoundError(f"Source file '{source_file}' does not exist.")
+# Code blocks are delimited by literal tags, so they are located with str.find
+_BLOCK_TAGS = {"<c>": "</c>", "<python>": "</python>"}
 
-    with open(source_file, "r") as f:
-        code = f.read()
+# The remaining WebThon tags, rewritten in the markup between blocks; the
+# <webthon> wrapper maps to "" so it is dropped in the same pass
+_SYNTAX = {**syntax(), "<webthon>": "", "</webthon>": ""}
+_SYNTAX_RE = re.compile("|".join(map(re.escape, _SYNTAX)))
 
-    # -------------------------
-    # Extract C code blocks
-    # -------------------------
-    c_blocks = re.findall(r"<c>(.*?)</c>", code, re.DOTALL)
-    for i, block in enumerate(c_blocks, start=1):
-        clean_block = textwrap.dedent(block).strip()
-        base_name = os.path.splitext(os.path.basename(source_file))[0]
-        c_file = os.path.join(c_folder, f"{base_name}_c_{i}.c")
+def _translate(m):
+    return _SYNTAX[m.group(0)]
 
-        with open(c_file, "w") as cf:
-            cf.write(clean_block)
+# Flags every C block is built with; they are part of the executable cache key
+_GCC_FLAGS = ("-O2", "-pipe")
+_GCC_KEY = ("|gcc " + " ".join(_GCC_FLAGS)).encode()
 
-        print(f"Extracted C code to {c_file}")
+# Page skeleton, written around the body instead of copying it into one big string
+_HTML_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<title>{title}</title>
+</head>
+<body>
+"""
 
-        # Compile and run automatically
-        exe_file = c_file.replace(".c", "")
-        try:
-            subprocess.run(["gcc", c_file, "-o", exe_file], check=True)
-            print(f"Compiled {c_file} → {exe_file}")
-            subprocess.run([exe_file])
-        except subprocess.CalledProcessError as e:
-            print(f"Error compiling C code: {e}")
+_HTML_FOOTER = """
+</body>
+</html>
+"""
 
-    code = re.sub(r"<c>.*?</c>", "", code, flags=re.DOTALL)
+def _read_source(source_file: str) -> str:
+    """
+    Reads a whole source file with raw os.read() calls and one decode,
+    skipping the buffered text-mode reader. The result matches what
+    open(source_file, "r").read() gives: locale encoding, "\n" line endings.
+    """
+    fd = os.open(source_file, os.O_RDONLY)
+    try:
+        # Usually a single read, but reads may come back short, so go to EOF
+        chunks = [os.read(fd, os.fstat(fd).st_size or 1)]
+        while chunks[-1]:
+            chunks.append(os.read(fd, 1 << 20))
+    finally:
+        os.close(fd)
+    code = b"".join(chunks).decode(locale.getpreferredencoding(False))
+    # Same universal-newline translation as text mode; textwrap.dedent
+    # treats a stray "\r" as an unindented line
+    return code.replace("\r\n", "\n").replace("\r", "\n")
 
-    # -------------------------
-    # Extract Python blocks
-    # -------------------------
-    python_blocks = re.findall(r"<python>(.*?)</python>", code, re.DOTALL)
-    for i, block in enumerate(python_blocks, start=1):
-        clean_block = textwrap.dedent(block).strip()
-        base_name = os.path.splitext(os.path.basename(source_file))[0]
-        python_file = os.path.join(python_folder, f"{base_name}_py_{i}.py")
+def _write_source(path: str, text: str) -> None:
+    """
+    Writes an extracted block with raw os.write() calls, skipping the
+    buffered text-mode writer.
+    """
+    data = memoryview(text.encode("utf-8"))
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        # Usually a single write, but writes may come back short
+        while data:
+            written = os.write(fd, data)
+            if written <= 0:
+                raise OSError(f"Could not write to '{path}'")
+            data = data[written:]
+    finally:
+        os.close(fd)
 
-        with open(python_file, "w") as pf:
-            pf.write(clean_block)
+def _iter_blocks(code: str):
+    """
+    Yields (html, tag, body) for every <c>/<python> block in source order,
+    where html is the markup before the block. The markup after the last
+    block comes last with tag and body set to None.
+    """
+    # Next start of each block kind; -1 once no more can be closed
+    starts = {tag: code.find(tag) for tag in _BLOCK_TAGS}
+    pos = 0
 
-        print(f"Extracted Python code to {python_file}")
+    while True:
+        open_tags = [tag for tag in starts if starts[tag] >= 0]
+        if not open_tags:
+            break
+        tag = min(open_tags, key=starts.get)
+        start = starts[tag]
+        end = code.find(_BLOCK_TAGS[tag], start + len(tag))
+        if end < 0:
+            # Unterminated: neither this nor any later block of its kind can close
+            starts[tag] = -1
+            continue
 
-        # Run Python in separate process (Tkinter, Pygame works)
-        try:
-            print("Launching Python program...")
-            subprocess.run(["python3", python_file])
-        except Exception as e:
-            print(f"Error executing Python code: {e}", file=sys.stderr)
+        yield code[pos:start], tag, code[start + len(tag):end]
+        pos = end + len(_BLOCK_TAGS[tag])
+        for other, other_start in starts.items():
+            if 0 <= other_start < pos:
+                starts[other] = code.find(other, pos)
 
-    code = re.sub(r"<python>.*?</python>", "", code, flags=re.DOTALL)
+    yield code[pos:], None, None
+
+def _extract_webthon_file(source_file: str, html_output: str, c_folder: str, python_folder: str):
+    """
+    Splits a .wth file into its C and Python blocks and writes the HTML page.
+    Returns the (c_file, exe_file, key) jobs to build and the Python files to run.
+    """
+    code = _read_source(source_file)
 
     # -------------------------
-    # Replace WebThon tags (<css> & <js>)
+    # Extract C/Python blocks and replace WebThon tags in a single pass,
+    # writing each block out as soon as it is found
     # -------------------------
-    for tag, html in syntax().items():
-        code = code.replace(tag, html)
+    base_name = os.path.splitext(os.path.basename(source_file))[0]
+    c_prefix = os.path.join(c_folder, f"{base_name}_c_")
+    python_prefix = os.path.join(python_folder, f"{base_name}_py_")
+    c_jobs = []
+    python_files = []
+    html_parts = []
+
+    for html, tag, block in _iter_blocks(code):
+        html_parts.append(_SYNTAX_RE.sub(_translate, html))
+
+        if tag == "<c>":
+            clean_block = textwrap.dedent(block).strip()
+            c_file = f"{c_prefix}{len(c_jobs) + 1}.c"
+
+            _write_source(c_file, clean_block)
+
+            print(f"Extracted C code to {c_file}")
+            key = hashlib.blake2b(clean_block.encode() + _GCC_KEY, digest_size=16).hexdigest()
+            c_jobs.append((c_file, c_file.replace(".c", ""), key))
+
+        elif tag == "<python>":
+            clean_block = textwrap.dedent(block).strip()
+            python_file = f"{python_prefix}{len(python_files) + 1}.py"
 
-    # Remove <webthon> wrapper if present
-    code = code.replace("<webthon>", "")
-    code = code.replace("</webthon>", "")
+            _write_source(python_file, clean_block)
+
+            print(f"Extracted Python code to {python_file}")
+            python_files.append(python_file)
 
     # -------------------------
     # Wrap in full HTML
     # -------------------------
-    html_content = f"""<!DOCTYPE html>
-<html>
-<head>
-<meta charset="UTF-8">
-<title>{os.path.basename(source_file)}</title>
-</head>
-<body>
-{code}
-</body>
-</html>
-"""
-
     with open(html_output, "w") as f:
-        f.write(html_content)
+        f.write(_HTML_HEADER.format(title=os.path.basename(source_file)))
+        f.writelines(html_parts)
+        f.write(_HTML_FOOTER)
 
     print(f"Compiled {source_file} to HTML: {html_output}")
 
+    return c_jobs, python_files
+
+def _extract_or_report(source_file: str, html_output: str, c_folder: str, python_folder: str):
+    """
+    Runs _extract_webthon_file(), reporting a failure and returning None
+    instead of raising, so one bad file doesn't stop the others.
+    """
+    try:
+        return _extract_webthon_file(source_file, html_output, c_folder, python_folder)
+    except Exception as e:
+        print(f"Error compiling {source_file}: {e}", file=sys.stderr)
+        return None
+
+def _install_file(src: str, dst: str) -> None:
+    """
+    Copies src to dst through a unique temp file in dst's folder and an
+    atomic rename. A concurrent run never sees a half-written dst, and a
+    dst that is still running is replaced rather than truncated (which
+    would fail with "Text file busy").
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dst) or ".")
+    os.close(fd)
+    try:
+        shutil.copy(src, tmp)
+        os.replace(tmp, dst)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+def _start_c_build(c_groups, cache_dir: str):
+    """
+    Starts compiling the (c_file, exe_file, key) jobs of every source file
+    with a single background `make -j` run instead of launching gcc once per
+    block. c_groups holds one list of jobs per file; each list becomes a
+    phony group target, so _wait_c_group() can hand back one file's
+    executables while the other files are still compiling.
+    Executables are cached in cache_dir under their content key, so unchanged
+    blocks skip gcc entirely. Call _finish_c_build() once every group is done.
+    """
+    build = {
+        "proc": None,
+        "cache_dir": cache_dir,
+        "cached": [[] for _ in c_groups],
+        "pending": [[] for _ in c_groups],
+        "done": set(),
+    }
+
+    # The cache only saves work; if it is unusable, blocks are simply built
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError as e:
+        print(f"Warning: C build cache unavailable: {e}", file=sys.stderr)
+
+    for n, c_jobs in enumerate(c_groups):
+        for c_file, exe_file, key in c_jobs:
+            cached = os.path.join(cache_dir, key)
+            if os.path.isfile(cached):
+                try:
+                    _install_file(cached, exe_file)
+                except OSError as e:
+                    print(f"Warning: could not use cached build of {c_file}: {e}", file=sys.stderr)
+                else:
+                    build["cached"][n].append((c_file, exe_file))
+                    continue
+            build["pending"][n].append((c_file, exe_file, key))
+
+        if not build["pending"][n]:
+            build["done"].add(n)
+
+    if len(build["done"]) == len(c_groups):
+        return build
+
+    def _quote(path):
+        # Quote for the recipe shell, then escape "$" for make itself
+        return shlex.quote(path).replace("$", "$$")
+
+    gcc = " ".join([_quote(_GCC), *_GCC_FLAGS])
+
+    # Phony numbered targets keep make away from the (possibly spaced) file
+    # names. Block recipes ignore gcc failures ("-") so every group target
+    # runs and echoes its file index; gcc diagnostics go to a per-block log
+    # that is printed with that file's build results.
+    groups = [f"f{n}" for n in range(len(c_groups)) if n not in build["done"]]
+    makefile = [f"all: {' '.join(groups)}"]
+    phony = ["all", *groups]
+    for n, pending in enumerate(build["pending"]):
+        if not pending:
+            continue
+        targets = [f"f{n}c{i}" for i in range(len(pending))]
+        phony.extend(targets)
+        makefile.append(f"f{n}: {' '.join(targets)}")
+        makefile.append(f"\t@echo {n}")
+        for target, (c_file, exe_file, _) in zip(targets, pending):
+            # Drop stale binaries so a failed build is never mistaken for a success
+            if os.path.exists(exe_file):
+                os.remove(exe_file)
+            makefile.append(f"{target}:")
+            makefile.append(
+                f"\t-{gcc} {_quote(c_file)} -o {_quote(exe_file)} 2> {_quote(exe_file + '.log')}"
+            )
+    makefile.append(f".PHONY: {' '.join(phony)}")
+
+    # make's own messages are kept aside and only shown if make itself fails
+    build["errors"] = tempfile.TemporaryFile("w+")
+    try:
+        build["proc"] = subprocess.Popen(
+            [_MAKE, "-s", f"-j{os.cpu_count() or 1}", "-f", "-"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=build["errors"],
+            text=True,
+            close_fds=False,
+        )
+    except FileNotFoundError:
+        build["errors"].close()
+        print("make not found, compiling C blocks one at a time with gcc")
+        for pending in build["pending"]:
+            for c_file, exe_file, _ in pending:
+                with open(exe_file + ".log", "w") as log:
+                    try:
+                        subprocess.run(
+                            [_GCC, *_GCC_FLAGS, c_file, "-o", exe_file],
+                            stderr=log,
+                            close_fds=False,
+                        )
+                    except FileNotFoundError as e:
+                        print(e, file=log)
+        build["done"].update(range(len(c_groups)))
+        return build
+    build["proc"].stdin.write("\n".join(makefile) + "\n")
+    build["proc"].stdin.close()
+    return build
+
+def _wait_c_group(build, n: int) -> set:
+    """
+    Waits until file n's C jobs from _start_c_build() are built, reports
+    them, caches the new executables and returns the ones ready to run.
+    """
+    proc = build["proc"]
+    while n not in build["done"]:
+        line = proc.stdout.readline()
+        if not line:
+            # make exited without reporting this group
+            break
+        if line.strip().isdigit():
+            build["done"].add(int(line))
+
+    built = set()
+    for c_file, exe_file in build["cached"][n]:
+        print(f"Using cached build of {c_file} → {exe_file}")
+        built.add(exe_file)
+
+    for c_file, exe_file, key in build["pending"][n]:
+        log = exe_file + ".log"
+        if os.path.isfile(log):
+            with open(log, "r") as f:
+                print(f.read(), end="", file=sys.stderr)
+            os.remove(log)
+
+        if os.path.isfile(exe_file):
+            print(f"Compiled {c_file} → {exe_file}")
+            built.add(exe_file)
+            try:
+                _install_file(exe_file, os.path.join(build["cache_dir"], key))
+            except OSError as e:
+                print(f"Warning: could not cache {exe_file}: {e}", file=sys.stderr)
+        else:
+            print(f"Error compiling C code: {c_file}")
+    return built
+
+def _finish_c_build(build) -> None:
+    """
+    Reaps the make run started by _start_c_build(), reporting make's own
+    errors if it failed.
+    """
+    proc = build["proc"]
+    if proc is None:
+        return
+
+    proc.stdout.close()
+    if proc.wait() != 0:
+        build["errors"].seek(0)
+        print(build["errors"].read(), end="", file=sys.stderr)
+        print(f"make exited with status {proc.returncode}")
+    build["errors"].close()
+
+def _run_webthon_programs(exe_files, python_files, html_output: str) -> None:
+    """
+    Runs the compiled C programs, then the Python blocks, then opens the page.
+    """
+    for exe_file in exe_files:
+        subprocess.run([exe_file], close_fds=False)
+
+    # Run Python in separate process (Tkinter, Pygame works)
+    for python_file in python_files:
+        try:
+            print("Launching Python program...")
+            subprocess.run([_PYTHON, python_file], close_fds=False)
+        except Exception as e:
+            print(f"Error executing Python code: {e}", file=sys.stderr)
+
     # Open HTML automatically in browser
     try:
         print("Opening HTML in browser...")
-        subprocess.run(["xdg-open", html_output])
+        subprocess.run([_XDG_OPEN, html_output], close_fds=False)
     except Exception as e:
         print(f"Could not open browser: {e}")
 
+def compile_webthon_file(source_file: str, html_output: str, c_folder: str, python_folder: str) -> None:
+    if not os.path.isfile(source_file):
+        raise FileNotFoundError(f"Source file '{source_file}' does not exist.")
+
+    c_jobs, python_files = _extract_webthon_file(source_file, html_output, c_folder, python_folder)
+    build = _start_c_build([c_jobs], os.path.join(c_folder, ".cache"))
+    try:
+        built = _wait_c_group(build, 0)
+    finally:
+        _finish_c_build(build)
+    exe_files = [exe_file for _, exe_file, _ in c_jobs if exe_file in built]
+    _run_webthon_programs(exe_files, python_files, html_output)
+
 def compile_all_webthon(program_folder: str):
     if not os.path.isdir(program_folder):
         raise NotADirectoryError(f"Folder '{program_folder}' does not exist.")
@@ -118,20 +417,49 @@ def compile_all_webthon(program_folder: str):
     os.makedirs(c_folder, exist_ok=True)
     os.makedirs(python_folder, exist_ok=True)
 
-    wth_files = [f for f in os.listdir(program_folder) if f.endswith(".wth")]
+    # DirEntry already knows whether it is a regular file, so no extra stat calls
+    with os.scandir(program_folder) as it:
+        wth_files = [e for e in it if e.is_file() and e.name.endswith(".wth")]
 
     if not wth_files:
         print("No .wth files found.")
         return
 
-    for wth_file in wth_files:
-        source_path = os.path.join(program_folder, wth_file)
-        html_output = os.path.join(
-            program_folder,
-            f"{os.path.splitext(wth_file)[0]}.html"
-        )
+    # Extract every file first, in parallel when there is more than one
+    sources = [wth_file.path for wth_file in wth_files]
+    html_outputs = [
+        os.path.join(program_folder, f"{os.path.splitext(wth_file.name)[0]}.html")
+        for wth_file in wth_files
+    ]
+    args = (sources, html_outputs, repeat(c_folder), repeat(python_folder))
+    workers = min(len(wth_files), os.cpu_count() or 1)
 
-        compile_webthon_file(source_path, html_output, c_folder, python_folder)
+    if workers == 1:
+        results = list(map(_extract_or_report, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_extract_or_report, *args))
+
+    # Files that failed to extract were already reported and are skipped
+    extracted = [
+        (html_output, *result)
+        for html_output, result in zip(html_outputs, results)
+        if result is not None
+    ]
+
+    # Build every C block in one background make run; each file's programs
+    # start as soon as its own blocks are done, while the rest keep compiling
+    build = _start_c_build(
+        [c_jobs for _, c_jobs, _ in extracted],
+        os.path.join(c_folder, ".cache"),
+    )
+    try:
+        for n, (html_output, c_jobs, python_files) in enumerate(extracted):
+            built = _wait_c_group(build, n)
+            exe_files = [exe_file for _, exe_file, _ in c_jobs if exe_file in built]
+            _run_webthon_programs(exe_files, python_files, html_output)
+    finally:
+        _finish_c_build(build)
 
 if __name__ == "__main__":
     program_folder = "/home/trenton/Webthon/Webthon Programs"